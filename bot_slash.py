@@ -10,13 +10,20 @@
 # - Persistence: set DB_PATH=/data/cyan_economy.db on Railway + mount /data volume
 # - Instant guild sync via setup_hook()
 
+import io
 import os
 import sqlite3
 import asyncio
+import copy
+import functools
+import hashlib
+import tempfile
+import json
 import random
-from datetime import datetime, timezone, timedelta
+import time
 from typing import Optional, List, Dict, Tuple
 
+import aiosqlite
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -43,13 +50,33 @@ OWNER_ID = 1269145029943758899         # your user ID (owner-only commands)
 
 CYAN_COLOR = 0x00E6FF  # clean cyan color
 
+_RNG = random.Random()  # shared instance; avoids module-level dispatch per call
+
+SLOTS_SYMBOLS = ("🍒","🍋","🍊","⭐","7")
+SYMBOL_IDX = {s: i for i, s in enumerate(SLOTS_SYMBOLS)}  # compact reel codes for the audit log
+
 # =========================
 # 2) BOT INIT
 # =========================
 intents = discord.Intents.default()
 intents.message_content = True  # optional; suppresses a warning
 bot = commands.Bot(command_prefix=BOT_PREFIX, intents=intents)
-db_lock = asyncio.Lock()
+
+# Per-user locks order logical read-modify-write per account (e.g. a game
+# view reading a balance it's about to bet); they do NOT protect the shared
+# connection — that's _DB_WRITE below.
+_USER_LOCKS: Dict[int, asyncio.Lock] = {}
+_USER_LOCKS_MAX = 1024
+
+def _ulock(user_id: int) -> asyncio.Lock:
+    lock = _USER_LOCKS.get(user_id)
+    if lock is None:
+        if len(_USER_LOCKS) >= _USER_LOCKS_MAX:  # evict idle locks so the dict stays bounded
+            for uid, lk in list(_USER_LOCKS.items()):
+                if not lk.locked():
+                    del _USER_LOCKS[uid]
+        lock = _USER_LOCKS[user_id] = asyncio.Lock()
+    return lock
 
 GUILD_INT = int(GUILD_ID)
 GUILD_OBJ = discord.Object(id=GUILD_INT)
@@ -57,122 +84,481 @@ GUILD_OBJ = discord.Object(id=GUILD_INT)
 # =========================
 # 3) DB + HELPERS
 # =========================
-def init_db():
-    with sqlite3.connect(DB) as conn:
-        c = conn.cursor()
-        c.execute("""CREATE TABLE IF NOT EXISTS users(
+_CONN: Optional[aiosqlite.Connection] = None  # single long-lived connection (opened in init_db)
+
+# All writes share _CONN, and an explicit BEGIN IMMEDIATE…COMMIT spans several
+# awaits — without a connection-level lock two tasks interleave statements
+# inside each other's transactions ("cannot start a transaction within a
+# transaction", lost writes). Every transaction AND every mutating autocommit
+# statement holds this lock; a lone statement issued while another task has a
+# transaction open would otherwise be absorbed into (and rolled back with) it.
+_DB_WRITE = asyncio.Lock()
+
+async def init_db():
+    global _CONN
+    # One persistent aiosqlite connection for the whole process: the sqlite work
+    # runs in aiosqlite's worker thread, so fsync never stalls the gateway
+    # heartbeat. autocommit mode (isolation_level=None); mutations use explicit
+    # BEGIN IMMEDIATE/COMMIT.
+    _CONN = await aiosqlite.connect(DB, isolation_level=None, cached_statements=128)
+    await _CONN.execute("PRAGMA journal_mode=WAL")
+    await _CONN.execute("PRAGMA synchronous=NORMAL")
+    await _CONN.execute("PRAGMA temp_store=MEMORY")
+    await _CONN.execute("PRAGMA cache_size=-64000")
+    await _CONN.execute("PRAGMA busy_timeout=5000")
+    c = await _CONN.cursor()
+    await c.execute("BEGIN IMMEDIATE")
+    await c.execute("""CREATE TABLE IF NOT EXISTS users(
                      user_id INTEGER PRIMARY KEY,
                      balance INTEGER DEFAULT 0,
-                     last_daily TEXT)""")
-        c.execute("""CREATE TABLE IF NOT EXISTS transactions(
+                     last_daily INTEGER)""")
+    await c.execute("""CREATE TABLE IF NOT EXISTS transactions(
                      id INTEGER PRIMARY KEY AUTOINCREMENT,
                      user_id INTEGER,
                      type TEXT,
                      amount INTEGER,
-                     ts TEXT,
+                     ts INTEGER,
                      details TEXT)""")
-        c.execute("""CREATE TABLE IF NOT EXISTS redeems(
+    await c.execute("""CREATE TABLE IF NOT EXISTS redeems(
                      id INTEGER PRIMARY KEY AUTOINCREMENT,
                      user_id INTEGER,
                      amount INTEGER,      -- CYAN charged
                      status TEXT,         -- pending/approved/denied/completed
-                     ts TEXT,
+                     ts INTEGER,
                      reason TEXT,
                      reward_id INTEGER,
                      ticket_channel_id INTEGER)""")
-        c.execute("""CREATE TABLE IF NOT EXISTS rewards(
+    await c.execute("""CREATE TABLE IF NOT EXISTS rewards(
                      id INTEGER PRIMARY KEY AUTOINCREMENT,
                      cost_cyan INTEGER NOT NULL,
                      robux INTEGER NOT NULL)""")
-        c.execute("""CREATE TABLE IF NOT EXISTS settings(
+    await c.execute("""CREATE TABLE IF NOT EXISTS settings(
                      key TEXT PRIMARY KEY,
                      value TEXT)""")
-        conn.commit()
-
-def setting_get(key: str, default=None):
-    with sqlite3.connect(DB) as conn:
-        c = conn.cursor()
-        c.execute("SELECT value FROM settings WHERE key=?", (key,))
-        r = c.fetchone()
-        return r[0] if r else default
-
-def setting_set(key: str, value: str):
-    with sqlite3.connect(DB) as conn:
-        c = conn.cursor()
-        c.execute("INSERT INTO settings(key,value) VALUES(?,?) ON CONFLICT(key) DO UPDATE SET value=?",
-                  (key, value, value))
-        conn.commit()
+    # Hot query shapes: /leaderboard walks the descending balance index instead
+    # of sorting the whole table; redeem-queue and per-user history lookups
+    # stop full-scanning.
+    await c.execute("CREATE INDEX IF NOT EXISTS ix_users_balance ON users(balance DESC)")
+    await c.execute("CREATE INDEX IF NOT EXISTS ix_redeems_status ON redeems(status)")
+    await c.execute("CREATE INDEX IF NOT EXISTS ix_redeems_user_status ON redeems(user_id, status)")
+    await c.execute("CREATE INDEX IF NOT EXISTS ix_tx_user_ts ON transactions(user_id, ts)")
+    await c.execute("CREATE INDEX IF NOT EXISTS ix_rewards_cost ON rewards(cost_cyan)")
+    await c.execute("COMMIT")
+    # Warm the settings cache once; values change maybe once per guild lifetime.
+    async with _CONN.execute("SELECT key, value FROM settings") as cur:
+        _SETTINGS.update(dict(await cur.fetchall()))
+    _ADMIN_ROLE_IDS.update(
+        int(x) for x in (_SETTINGS.get("admin_role_ids") or "").split(",") if x.strip())
+    # Read-only pool: WAL lets readers run while the writer commits, so pure
+    # SELECTs (balance, leaderboard, rewards) stop queueing behind writes on
+    # _CONN's single worker thread. Opened after the schema exists (mode=ro
+    # fails on a missing file).
+    global _READERS
+    _READERS = asyncio.Queue()
+    for _ in range(_READER_COUNT):
+        r = await aiosqlite.connect(f"file:{DB}?mode=ro", uri=True,
+                                    isolation_level=None, cached_statements=128)
+        await r.execute("PRAGMA busy_timeout=5000")
+        await r.execute("PRAGMA cache_size=-64000")
+        _READERS.put_nowait(r)
+
+_SETTINGS: Dict[str, str] = {}  # write-through cache over the settings table
+
+_READERS: Optional[asyncio.Queue] = None  # pool of mode=ro connections (see init_db)
+_READER_COUNT = 3
+
+async def read_one(sql: str, params=()) -> Optional[tuple]:
+    conn = await _READERS.get()
+    try:
+        async with conn.execute(sql, params) as cur:
+            return await cur.fetchone()
+    finally:
+        _READERS.put_nowait(conn)
+
+async def read_all(sql: str, params=()) -> List[tuple]:
+    conn = await _READERS.get()
+    try:
+        async with conn.execute(sql, params) as cur:
+            return list(await cur.fetchall())
+    finally:
+        _READERS.put_nowait(conn)
+
+# Optional fast path for staff buttons: role-id membership is a set lookup,
+# vs recomputing the guild Permissions bitfield on every click. Configured via
+# the "admin_role_ids" setting (comma-separated); permission check remains the
+# fallback either way.
+_ADMIN_ROLE_IDS: set = set()
+
+def is_staff(member: discord.Member) -> bool:
+    if _ADMIN_ROLE_IDS:
+        for role in member.roles:
+            if role.id in _ADMIN_ROLE_IDS:
+                return True
+    return member.guild_permissions.manage_guild or member.guild_permissions.administrator
+
+# Hot-path SQL as module constants: passing the identical string object every
+# call keeps sqlite's LRU statement cache hit rate at ~100%, skipping re-parse.
+SQL_GET_BAL = "SELECT balance FROM users WHERE user_id=?"
+SQL_UPSERT_BAL = ("INSERT INTO users(user_id,balance) VALUES(?,?) "
+                  "ON CONFLICT(user_id) DO UPDATE SET balance=excluded.balance")
+SQL_INSERT_TX = "INSERT INTO transactions(user_id,type,amount,ts,details) VALUES(?,?,?,?,?)"
+SQL_BET_DELTA = ("UPDATE users SET balance = balance + ? "
+                 "WHERE user_id=? AND balance >= ? AND balance + ? >= 0 RETURNING balance")
+SQL_DAILY_UPSERT = ("INSERT INTO users(user_id,balance,last_daily) VALUES(?,?,?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET "
+                    "balance = users.balance + excluded.balance, last_daily = excluded.last_daily "
+                    "WHERE excluded.last_daily - IFNULL(users.last_daily, 0) >= 86400 "
+                    "RETURNING balance")
+SQL_SELECT_REWARD = "SELECT cost_cyan, robux FROM rewards WHERE id=?"
+SQL_UPDATE_REDEEM_STATUS = ("UPDATE redeems SET status=?, reason=? "
+                            "WHERE id=? AND status='pending' "
+                            "RETURNING user_id, amount, reward_id")
+
+def now_ts() -> int:
+    # unix seconds: 8 bytes per row vs ~30 for ISO text, and no
+    # fromisoformat parsing on the /daily hot path
+    return int(time.time())
+
+async def setting_get(key: str, default=None):
+    return _SETTINGS.get(key, default)
+
+async def setting_set(key: str, value: str):
+    async with _DB_WRITE:
+        c = await _CONN.cursor()
+        await c.execute("BEGIN IMMEDIATE")
+        try:
+            await c.execute("INSERT INTO settings(key,value) VALUES(?,?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                            (key, value))
+            await c.execute("COMMIT")
+        # BaseException: even a task cancelled mid-transaction must roll back,
+        # or the connection is left with an open transaction and every later
+        # write fails. Same pattern on every BEGIN IMMEDIATE below.
+        except BaseException:
+            await c.execute("ROLLBACK")
+            raise
+    _SETTINGS[key] = value
+
+# Per-user balance cache. Every mutating helper learns the new balance
+# (computed or via RETURNING) and writes it through while still holding
+# _DB_WRITE, so commit order and cache order agree. FIFO-capped.
+_BAL_CACHE: Dict[int, int] = {}
+_BAL_CACHE_MAX = 4096
+_BAL_GEN = 0  # bumped on every put; lets get_balance detect a concurrent write
+
+def _bal_cache_put(user_id: int, bal: int):
+    global _BAL_GEN
+    _BAL_GEN += 1
+    if user_id not in _BAL_CACHE and len(_BAL_CACHE) >= _BAL_CACHE_MAX:
+        del _BAL_CACHE[next(iter(_BAL_CACHE))]
+    _BAL_CACHE[user_id] = bal
 
 async def get_balance(user_id: int) -> int:
-    async with db_lock:
-        with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("SELECT balance FROM users WHERE user_id=?", (user_id,))
-            r = c.fetchone()
-            return r[0] if r else 0
+    bal = _BAL_CACHE.get(user_id)
+    if bal is None:
+        gen = _BAL_GEN
+        r = await read_one(SQL_GET_BAL, (user_id,))
+        bal = r[0] if r else 0
+        # If a write committed while the reader was out, our value may already
+        # be stale — caching it would pin the old balance. Only cache when no
+        # put landed in the meantime, and prefer the written-through value.
+        if _BAL_GEN == gen:
+            _bal_cache_put(user_id, bal)
+        else:
+            bal = _BAL_CACHE.get(user_id, bal)
+    return bal
 
 async def set_balance(user_id: int, new_bal: int):
-    async with db_lock:
-        with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("INSERT INTO users(user_id,balance) VALUES(?,?) ON CONFLICT(user_id) DO UPDATE SET balance=?",
-                      (user_id, new_bal, new_bal))
-            conn.commit()
+    async with _DB_WRITE:
+        c = await _CONN.cursor()
+        await c.execute("BEGIN IMMEDIATE")
+        try:
+            await c.execute(SQL_UPSERT_BAL, (user_id, new_bal))
+            await c.execute("COMMIT")
+        except BaseException:
+            await c.execute("ROLLBACK")
+            raise
+        _bal_cache_put(user_id, new_bal)
+
+# The transactions table is a pure audit log, so entries are queued in memory
+# and flushed in one executemany batch — one fsync per batch instead of per row.
+_TX_QUEUE: List[Tuple[int, str, int, int, str]] = []
+_TX_FLUSH_SECS = 0.5
+_TX_FLUSH_ROWS = 64
+_TX_LOCK = asyncio.Lock()  # flusher-only; independent of the per-user locks
 
 async def add_transaction(user_id: int, ttype: str, amount: int, details: str = ""):
-    ts = datetime.now(timezone.utc).isoformat()
-    async with db_lock:
-        with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("INSERT INTO transactions(user_id,type,amount,ts,details) VALUES(?,?,?,?,?)",
-                      (user_id, ttype, amount, ts, details))
-            conn.commit()
+    _TX_QUEUE.append((user_id, ttype, amount, now_ts(), details))
+    if len(_TX_QUEUE) >= _TX_FLUSH_ROWS:
+        await _flush_transactions()
+
+async def _flush_transactions():
+    async with _TX_LOCK:
+        if not _TX_QUEUE:
+            return
+        # Snapshot the batch but only drop it from the queue after COMMIT:
+        # a failed flush (SQLITE_BUSY past the timeout, disk error) keeps the
+        # rows queued for the next tick instead of losing them. Appends that
+        # land during the awaits sit past len(rows) and survive the del.
+        rows = _TX_QUEUE[:]
+        async with _DB_WRITE:
+            c = await _CONN.cursor()
+            await c.execute("BEGIN IMMEDIATE")
+            try:
+                await c.executemany(SQL_INSERT_TX, rows)
+                await c.execute("COMMIT")
+            except BaseException:
+                await c.execute("ROLLBACK")
+                raise
+        del _TX_QUEUE[:len(rows)]
+
+_TX_FLUSHER_TASK: Optional[asyncio.Task] = None  # strong ref; the loop only keeps weak ones
+
+async def _tx_flusher():
+    try:
+        while True:
+            await asyncio.sleep(_TX_FLUSH_SECS)
+            try:
+                await _flush_transactions()
+            except Exception as e:
+                # transient failure: the batch is still queued, retry next
+                # tick — the drain task must not die or rows only leave the
+                # queue on the size trigger
+                print(f"[TX] flush failed, retrying next tick: {e!r}")
+    except asyncio.CancelledError:
+        await _flush_transactions()  # final flush on shutdown
+        raise
+
+async def apply_bet_delta(user_id: int, delta: int, ttype: str, details: str = "",
+                          min_balance: int = 0) -> Optional[int]:
+    # One BEGIN IMMEDIATE transaction for balance update + log insert instead of
+    # SELECT → UPSERT → INSERT (three commits). The WHERE clause doubles as the
+    # funds check, so there's no TOCTOU between checking and paying out.
+    async with _ulock(user_id), _DB_WRITE:
+        c = await _CONN.cursor()
+        await c.execute("BEGIN IMMEDIATE")
+        try:
+            await c.execute(SQL_BET_DELTA, (delta, user_id, min_balance, delta))
+            r = await c.fetchone()
+            if r is None:
+                await c.execute("ROLLBACK")
+                return None
+            await c.execute(SQL_INSERT_TX, (user_id, ttype, delta, now_ts(), details))
+            await c.execute("COMMIT")
+        except BaseException:
+            await c.execute("ROLLBACK")
+            raise
+        _bal_cache_put(user_id, r[0])
+        return r[0]
+
+async def adjust_balance(user_id: int, delta: int, ttype: str, details: str = "") -> int:
+    # Insert-if-missing + additive UPDATE: the delta applies atomically with no
+    # SELECT round-trip, and the audit row commits with it. Returns new balance.
+    async with _ulock(user_id), _DB_WRITE:
+        c = await _CONN.cursor()
+        await c.execute("BEGIN IMMEDIATE")
+        try:
+            await c.execute("INSERT INTO users(user_id,balance) VALUES(?,0) ON CONFLICT(user_id) DO NOTHING", (user_id,))
+            await c.execute("UPDATE users SET balance = balance + ? WHERE user_id=? RETURNING balance", (delta, user_id))
+            new_bal = (await c.fetchone())[0]
+            await c.execute(SQL_INSERT_TX, (user_id, ttype, delta, now_ts(), details))
+            await c.execute("COMMIT")
+        except BaseException:
+            await c.execute("ROLLBACK")
+            raise
+        _bal_cache_put(user_id, new_bal)
+        return new_bal
+
+async def debit_up_to(user_id: int, amount: int, ttype: str, details: str = "") -> int:
+    # Game losses drain to zero rather than reject, so the debit is
+    # min(amount, balance); read and write share one BEGIN IMMEDIATE so two
+    # concurrent clicks can't both see the same starting balance.
+    # Returns the amount actually debited.
+    async with _ulock(user_id), _DB_WRITE:
+        c = await _CONN.cursor()
+        await c.execute("BEGIN IMMEDIATE")
+        try:
+            await c.execute(SQL_GET_BAL, (user_id,))
+            r = await c.fetchone()
+            bal = r[0] if r else 0
+            loss = min(amount, bal)
+            await c.execute(SQL_UPSERT_BAL, (user_id, bal - loss))
+            await c.execute(SQL_INSERT_TX, (user_id, ttype, -loss, now_ts(), details))
+            await c.execute("COMMIT")
+        except BaseException:
+            await c.execute("ROLLBACK")
+            raise
+        _bal_cache_put(user_id, bal - loss)
+        return loss
+
+async def transfer(sender_id: int, receiver_id: int, amount: int) -> bool:
+    # Debit and credit commit together: the guarded UPDATE rejects an
+    # overdraft, the receiver upsert and both audit rows ride the same
+    # BEGIN IMMEDIATE — one fsync, and no window where only one side moved.
+    async with _ulock(sender_id), _DB_WRITE:
+        c = await _CONN.cursor()
+        await c.execute("BEGIN IMMEDIATE")
+        try:
+            await c.execute("UPDATE users SET balance = balance - ? WHERE user_id=? AND balance >= ? RETURNING balance",
+                            (amount, sender_id, amount))
+            sender_row = await c.fetchone()
+            if sender_row is None:
+                await c.execute("ROLLBACK")
+                return False
+            await c.execute("INSERT INTO users(user_id,balance) VALUES(?,?) "
+                            "ON CONFLICT(user_id) DO UPDATE SET balance = balance + excluded.balance "
+                            "RETURNING balance",
+                            (receiver_id, amount))
+            recv_row = await c.fetchone()
+            ts = now_ts()
+            await c.executemany(SQL_INSERT_TX, [
+                (sender_id, "gift_send", -amount, ts, f"to {receiver_id}"),
+                (receiver_id, "gift_recv", amount, ts, f"from {sender_id}"),
+            ])
+            await c.execute("COMMIT")
+        except BaseException:
+            await c.execute("ROLLBACK")
+            raise
+        _bal_cache_put(sender_id, sender_row[0])
+        _bal_cache_put(receiver_id, recv_row[0])
+        return True
 
 def clamp_bet(bet: int) -> int:
-    if bet < MIN_BET: return MIN_BET
-    if bet > MAX_BET: return MAX_BET
-    return bet
+    return min(MAX_BET, max(MIN_BET, bet))
 
 # Rewards helpers (GLOBAL)
-def list_rewards() -> List[Tuple[int,int,int]]:
-    with sqlite3.connect(DB) as conn:
-        c = conn.cursor()
-        c.execute("SELECT id, cost_cyan, robux FROM rewards ORDER BY cost_cyan ASC")
-        return c.fetchall()
-
-def add_reward(cost: int, robux: int) -> int:
-    with sqlite3.connect(DB) as conn:
-        c = conn.cursor()
-        c.execute("INSERT INTO rewards(cost_cyan, robux) VALUES(?,?)", (cost, robux))
-        rid = c.lastrowid
-        conn.commit()
-        return rid
-
-def remove_reward(rid: int) -> bool:
-    with sqlite3.connect(DB) as conn:
-        c = conn.cursor()
-        c.execute("DELETE FROM rewards WHERE id=?", (rid,))
-        conn.commit()
-        return c.rowcount > 0
+# Rewards only change on admin /addreward//removereward, so the sorted list is
+# cached in memory and the mutators invalidate it; the Rewards button stops
+# hitting the DB per click. The version counter keys the SelectOption cache.
+_REWARDS_CACHE: Optional[List[Tuple[int,int,int]]] = None
+_REWARDS_VERSION = 0
+
+async def list_rewards() -> List[Tuple[int,int,int]]:
+    global _REWARDS_CACHE
+    if _REWARDS_CACHE is None:
+        _REWARDS_CACHE = await read_all("SELECT id, cost_cyan, robux FROM rewards ORDER BY cost_cyan ASC")
+    return _REWARDS_CACHE
+
+def _invalidate_rewards_cache():
+    global _REWARDS_CACHE, _REWARDS_VERSION
+    _REWARDS_CACHE = None
+    _REWARDS_VERSION += 1
+
+async def add_reward(cost: int, robux: int) -> int:
+    async with _DB_WRITE:
+        c = await _CONN.cursor()
+        await c.execute("BEGIN IMMEDIATE")
+        try:
+            await c.execute("INSERT INTO rewards(cost_cyan, robux) VALUES(?,?)", (cost, robux))
+            rid = c.lastrowid
+            await c.execute("COMMIT")
+        except BaseException:
+            await c.execute("ROLLBACK")
+            raise
+    _invalidate_rewards_cache()
+    return rid
+
+async def add_rewards(rows: List[Tuple[int, int]]) -> List[int]:
+    # Bulk seed path: N rewards in one transaction (one fsync) instead of N.
+    if not rows:
+        return []
+    async with _DB_WRITE:
+        c = await _CONN.cursor()
+        await c.execute("BEGIN IMMEDIATE")
+        try:
+            await c.executemany("INSERT INTO rewards(cost_cyan, robux) VALUES(?,?)", rows)
+            await c.execute("SELECT id FROM rewards ORDER BY id DESC LIMIT ?", (len(rows),))
+            ids = [r[0] for r in await c.fetchall()][::-1]
+            await c.execute("COMMIT")
+        except BaseException:
+            await c.execute("ROLLBACK")
+            raise
+    _invalidate_rewards_cache()
+    return ids
+
+async def remove_reward(rid: int) -> bool:
+    async with _DB_WRITE:
+        c = await _CONN.cursor()
+        await c.execute("BEGIN IMMEDIATE")
+        try:
+            await c.execute("DELETE FROM rewards WHERE id=?", (rid,))
+            removed = c.rowcount
+            await c.execute("COMMIT")
+        except BaseException:
+            await c.execute("ROLLBACK")
+            raise
+    _invalidate_rewards_cache()
+    return removed > 0
+
+async def submit_redeem(user_id: int, reward_id: int) -> Optional[Tuple[Optional[int], int, int]]:
+    # Single transaction for the whole redeem submission: reward lookup, charge,
+    # audit row, and pending-redeem insert commit together, so the price can't
+    # change (or the balance be double-spent) between check and debit.
+    # Returns (request_id, cost, robux); request_id is None when the balance
+    # can't cover the cost, and the whole result is None for a missing reward.
+    async with _ulock(user_id), _DB_WRITE:
+        c = await _CONN.cursor()
+        await c.execute("BEGIN IMMEDIATE")
+        try:
+            await c.execute(SQL_SELECT_REWARD, (reward_id,))
+            row = await c.fetchone()
+            if row is None:
+                await c.execute("ROLLBACK")
+                return None
+            cost, robux = row
+            await c.execute("UPDATE users SET balance = balance - ? WHERE user_id=? AND balance >= ? RETURNING balance",
+                            (cost, user_id, cost))
+            debit_row = await c.fetchone()
+            if debit_row is None:
+                await c.execute("ROLLBACK")
+                return (None, cost, robux)
+            await c.execute(SQL_INSERT_TX,
+                            (user_id, "redeem_request", -cost, now_ts(), f"reward_id {reward_id} robux {robux}"))
+            await c.execute("INSERT INTO redeems(user_id, amount, status, ts, reason, reward_id, ticket_channel_id) "
+                            "VALUES(?,?,?,?,?,?,?) RETURNING id",
+                            (user_id, cost, "pending", now_ts(), "", reward_id, None))
+            request_id = (await c.fetchone())[0]
+            await c.execute("COMMIT")
+        except BaseException:
+            await c.execute("ROLLBACK")
+            raise
+        _bal_cache_put(user_id, debit_row[0])
+        return (request_id, cost, robux)
 
 # =========================
 # 4) VIEWS (Tickets, Approvals, GUI, Games)
 # =========================
-def casino_embed(user: discord.User, balance: int, bet: int) -> discord.Embed:
-    e = discord.Embed(
-        title="CYAN Casino",
-        description=(
-            "Play via buttons below.\n"
-            "Games: Coinflip · Slots · Mines · Tower · Roulette\n"
-            "Use Rewards to redeem Robux."
-        ),
-        color=CYAN_COLOR
-    )
+# Title/description/color never change — build them once and copy per call
+# instead of re-allocating the whole embed on every click/refresh.
+_CASINO_EMBED_TEMPLATE = discord.Embed(
+    title="CYAN Casino",
+    description=(
+        "Play via buttons below.\n"
+        "Games: Coinflip · Slots · Mines · Tower · Roulette\n"
+        "Use Rewards to redeem Robux."
+    ),
+    color=CYAN_COLOR
+)
+
+@functools.lru_cache(maxsize=32)
+def _casino_embed_dict(name: str, icon_url: Optional[str], balance: int, bet: int) -> dict:
+    e = _CASINO_EMBED_TEMPLATE.copy()
     e.add_field(name="Balance", value=f"`{balance} CYAN`", inline=True)
     e.add_field(name="Bet", value=f"`{bet} CYAN`", inline=True)
-    e.set_footer(text=f"Player: {user}", icon_url=user.display_avatar.url if hasattr(user.display_avatar, 'url') else discord.Embed.Empty)
-    return e
+    e.set_footer(text=f"Player: {name}", icon_url=icon_url)
+    return e.to_dict()
 
+def casino_embed(user: discord.User, balance: int, bet: int) -> discord.Embed:
+    # Repeated panel refreshes for the same (player, balance, bet) reuse the
+    # serialized embed payload; from_dict skips the field/footer rebuilding.
+    # The result is sent as-is, never mutated.
+    icon_url = user.display_avatar.url if hasattr(user.display_avatar, "url") else None
+    return discord.Embed.from_dict(_casino_embed_dict(str(user), icon_url, balance, bet))
+
+# The review modals carry only the redeem id; everything else is re-read from
+# the redeems row at submit time. The id in the custom_id keeps concurrent
+# submissions from the same staff member routed to the right modal. (A shared
+# singleton isn't safe — discord.py stores the submitted TextInput values on
+# the modal instance.)
 class ApprovalReasonModal(discord.ui.Modal, title="Approval Note / Instructions"):
     note = discord.ui.TextInput(
         label="Approval note (visible to user)",
@@ -181,11 +567,11 @@ class ApprovalReasonModal(discord.ui.Modal, title="Approval Note / Instructions"
         style=discord.TextStyle.paragraph,
         max_length=300
     )
-    def __init__(self, callback_on_submit):
-        super().__init__()
-        self.callback_on_submit = callback_on_submit
+    def __init__(self, request_id: int):
+        super().__init__(custom_id=f"redeem_approve:{request_id}")
+        self.request_id = request_id
     async def on_submit(self, interaction: discord.Interaction) -> None:
-        await self.callback_on_submit(interaction, self.note.value or "")
+        await _finalize_redeem(interaction, self.request_id, "approved", self.note.value or "")
 
 class DenyReasonModal(discord.ui.Modal, title="Denial Reason"):
     reason = discord.ui.TextInput(
@@ -195,110 +581,141 @@ class DenyReasonModal(discord.ui.Modal, title="Denial Reason"):
         style=discord.TextStyle.paragraph,
         max_length=300
     )
-    def __init__(self, callback_on_submit):
-        super().__init__()
-        self.callback_on_submit = callback_on_submit
+    def __init__(self, request_id: int):
+        super().__init__(custom_id=f"redeem_deny:{request_id}")
+        self.request_id = request_id
     async def on_submit(self, interaction: discord.Interaction) -> None:
-        await self.callback_on_submit(interaction, self.reason.value)
-
-class TicketCloseView(discord.ui.View):
-    def __init__(self, user_id:int, redeem_id:int, *, timeout: Optional[float]=None):
-        super().__init__(timeout=timeout)
-        self.user_id = user_id
+        await _finalize_redeem(interaction, self.request_id, "denied", self.reason.value)
+
+# Ticket/review buttons are DynamicItems: the redeem id lives in the
+# custom_id and the rest of the state in the redeems row, so the views are
+# persistent (timeout=None), survive restarts via bot.add_dynamic_items in
+# setup_hook, and nothing per-pending-redeem sits in process memory.
+class TicketCloseButton(discord.ui.DynamicItem[discord.ui.Button],
+                        template=r"ticket:close:(?P<id>[0-9]+)"):
+    def __init__(self, redeem_id: int):
         self.redeem_id = redeem_id
-    async def _is_admin(self, interaction: discord.Interaction) -> bool:
-        return interaction.user.guild_permissions.manage_guild or interaction.user.guild_permissions.administrator
-    @discord.ui.button(label="Close Ticket", style=discord.ButtonStyle.danger, emoji="🔒")
-    async def close(self, interaction: discord.Interaction, _btn: discord.ui.Button):
-        if not await self._is_admin(interaction):
+        super().__init__(discord.ui.Button(
+            label="Close Ticket", style=discord.ButtonStyle.danger, emoji="🔒",
+            custom_id=f"ticket:close:{redeem_id}"))
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(int(match["id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        if not is_staff(interaction.user):
             return await interaction.response.send_message("Admins only.")
-        with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("UPDATE redeems SET status=? WHERE id=?", ("completed", self.redeem_id))
-            conn.commit()
+        async with _DB_WRITE:
+            c = await _CONN.cursor()
+            await c.execute("BEGIN IMMEDIATE")
+            try:
+                await c.execute("UPDATE redeems SET status=? WHERE id=?", ("completed", self.redeem_id))
+                await c.execute("COMMIT")
+            except BaseException:
+                await c.execute("ROLLBACK")
+                raise
         await interaction.response.send_message("Ticket marked complete. Deleting in 3 seconds…")
         await asyncio.sleep(3)
         try:
             await interaction.channel.delete(reason=f"Redeem #{self.redeem_id} completed")
-        except:
+        except discord.HTTPException:
             pass
 
-class RedeemReviewView(discord.ui.View):
-    """Staff Approve / Deny for a redeem request; on approve, opens a ticket channel."""
-    def __init__(self, request_id: int, user_id: int, amount: int, reward_id: int, *, timeout: Optional[float] = 900):
-        super().__init__(timeout=timeout)
+class TicketCloseView(discord.ui.View):
+    def __init__(self, redeem_id: int):
+        super().__init__(timeout=None)
+        self.add_item(TicketCloseButton(redeem_id))
+
+async def _open_ticket(interaction: discord.Interaction, request_id: int,
+                       user_id: int, amount: int, reward_id: int, note: str):
+    guild = interaction.guild
+    member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(view_channel=False),
+        member: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True),
+        guild.me: discord.PermissionOverwrite(view_channel=True, manage_channels=True, send_messages=True, read_message_history=True)
+    }
+    name = f"ticket-{member.name}-{request_id}".lower()[:95]
+    ch = await guild.create_text_channel(name=name, overwrites=overwrites,
+                                         reason=f"Redeem #{request_id} approved")
+    embed = discord.Embed(
+        title=f"Redeem Ticket #{request_id}",
+        description=(f"User: {member.mention}\n"
+                     f"Amount charged: **{amount} CYAN**\n"
+                     f"Reward ID: **{reward_id}**\n\n"
+                     f"**Staff Note:** {note or 'No note'}"),
+        color=CYAN_COLOR
+    )
+    # The channel-id bookkeeping write and the ticket message are
+    # independent — overlap them instead of paying the latencies in series.
+    async def _record_channel():
+        async with _DB_WRITE:
+            await _CONN.execute("UPDATE redeems SET ticket_channel_id=? WHERE id=?", (ch.id, request_id))
+    await asyncio.gather(
+        _record_channel(),
+        ch.send(content=member.mention, embed=embed, view=TicketCloseView(request_id)),
+    )
+
+async def _finalize_redeem(interaction: discord.Interaction, request_id: int, status: str, note: str):
+    # Single conditional UPDATE: the status='pending' guard and the write are
+    # one atomic statement, so two staff members approving at once can't both
+    # pass a separate check — exactly one gets the row back.
+    async with _DB_WRITE:
+        async with _CONN.execute(SQL_UPDATE_REDEEM_STATUS, (status, note, request_id)) as cur:
+            r = await cur.fetchone()
+    if r is None:
+        return await interaction.response.send_message("Already processed.")
+    user_id, amount, reward_id = r
+    try:
+        # cache-only lookup first; fetch_user always costs a REST round-trip
+        user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+        await user.send(f"Your redeem request #{request_id} was **{status.upper()}**.\nNote: {note or '—'}")
+    except discord.HTTPException:
+        pass
+    try:
+        # components-only PATCH: stripping the view is a few bytes vs
+        # re-serializing two disabled buttons, and the buttons are dead anyway.
+        await interaction.message.edit(view=None)
+    except discord.HTTPException:
+        pass
+    if status == "approved":
+        await interaction.response.send_message("Approved. Opening ticket…")
+        await _open_ticket(interaction, request_id, user_id, amount, reward_id, note)
+    else:
+        await interaction.response.send_message("Denied.")
+
+class RedeemActionButton(discord.ui.DynamicItem[discord.ui.Button],
+                         template=r"redeem:(?P<action>approve|deny):(?P<id>[0-9]+)"):
+    def __init__(self, action: str, request_id: int):
+        self.action = action
         self.request_id = request_id
-        self.user_id = user_id
-        self.amount = amount
-        self.reward_id = reward_id
-    async def _ensure_admin(self, interaction: discord.Interaction) -> bool:
-        if not (interaction.user.guild_permissions.manage_guild or interaction.user.guild_permissions.administrator):
-            await interaction.response.send_message("Admins only.")
-            return False
-        return True
-    async def _open_ticket(self, interaction: discord.Interaction, note: str):
-        guild = interaction.guild
-        member = guild.get_member(self.user_id) or await guild.fetch_member(self.user_id)
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            member: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True),
-            guild.me: discord.PermissionOverwrite(view_channel=True, manage_channels=True, send_messages=True, read_message_history=True)
-        }
-        name = f"ticket-{member.name}-{self.request_id}".lower()[:95]
-        ch = await guild.create_text_channel(name=name, overwrites=overwrites,
-                                             reason=f"Redeem #{self.request_id} approved")
-        with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("UPDATE redeems SET ticket_channel_id=? WHERE id=?", (ch.id, self.request_id))
-            conn.commit()
-        embed = discord.Embed(
-            title=f"Redeem Ticket #{self.request_id}",
-            description=(f"User: {member.mention}\n"
-                         f"Amount charged: **{self.amount} CYAN**\n"
-                         f"Reward ID: **{self.reward_id}**\n\n"
-                         f"**Staff Note:** {note or 'No note'}"),
-            color=CYAN_COLOR
-        )
-        await ch.send(content=member.mention, embed=embed,
-                      view=TicketCloseView(user_id=self.user_id, redeem_id=self.request_id))
-    async def _finalize(self, interaction: discord.Interaction, status: str, note: str):
-        with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("SELECT status FROM redeems WHERE id=?", (self.request_id,))
-            r = c.fetchone()
-            if not r or r[0] != "pending":
-                return await interaction.response.send_message("Already processed.")
-            c.execute("UPDATE redeems SET status=?, reason=? WHERE id=?", (status, note, self.request_id))
-            conn.commit()
-        try:
-            user = await bot.fetch_user(self.user_id)
-            await user.send(f"Your redeem request #{self.request_id} was **{status.upper()}**.\nNote: {note or '—'}")
-        except:
-            pass
-        for child in self.children:
-            if isinstance(child, discord.ui.Button):
-                child.disabled = True
-        try:
-            await interaction.message.edit(view=self)
-        except:
-            pass
-        if status == "approved":
-            await interaction.response.send_message("Approved. Opening ticket…")
-            await self._open_ticket(interaction, note)
+        if action == "approve":
+            btn = discord.ui.Button(label="Approve", style=discord.ButtonStyle.success, emoji="✅",
+                                    custom_id=f"redeem:approve:{request_id}")
+        else:
+            btn = discord.ui.Button(label="Deny", style=discord.ButtonStyle.danger, emoji="🛑",
+                                    custom_id=f"redeem:deny:{request_id}")
+        super().__init__(btn)
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], int(match["id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        if not is_staff(interaction.user):
+            return await interaction.response.send_message("Admins only.")
+        if self.action == "approve":
+            await interaction.response.send_modal(ApprovalReasonModal(self.request_id))
         else:
-            await interaction.response.send_message("Denied.")
-    @discord.ui.button(label="Approve", style=discord.ButtonStyle.success, emoji="✅")
-    async def approve_btn(self, interaction: discord.Interaction, _btn: discord.ui.Button):
-        if not await self._ensure_admin(interaction): return
-        async def _ok(ix: discord.Interaction, note: str):
-            await self._finalize(ix, "approved", note)
-        await interaction.response.send_modal(ApprovalReasonModal(_ok))
-    @discord.ui.button(label="Deny", style=discord.ButtonStyle.danger, emoji="🛑")
-    async def deny_btn(self, interaction: discord.Interaction, _btn: discord.ui.Button):
-        if not await self._ensure_admin(interaction): return
-        async def _deny(ix: discord.Interaction, reason: str):
-            await self._finalize(ix, "denied", reason)
-        await interaction.response.send_modal(DenyReasonModal(_deny))
+            await interaction.response.send_modal(DenyReasonModal(self.request_id))
+
+class RedeemReviewView(discord.ui.View):
+    """Staff Approve / Deny for a redeem request; on approve, opens a ticket channel."""
+    def __init__(self, request_id: int):
+        super().__init__(timeout=None)
+        self.add_item(RedeemActionButton("approve", request_id))
+        self.add_item(RedeemActionButton("deny", request_id))
 
 # ---- Mines (Difficulty Picker + Game + Cashout)
 DIFFS: Dict[str, Tuple[int,int]] = {
@@ -308,6 +725,16 @@ DIFFS: Dict[str, Tuple[int,int]] = {
 }
 
 class MinesView(discord.ui.View):
+    # Tile prototypes built once at import: the grid shape is fixed, so each
+    # game clones them (Item + its underlying component) instead of paying 25
+    # Button constructions with emoji parsing per start.
+    _GRID_SIZE = 5
+    _TILE_TEMPLATE = [
+        discord.ui.Button(emoji="⬛", style=discord.ButtonStyle.secondary,
+                          custom_id=f"mine_{i}", row=i // 5)
+        for i in range(25)
+    ]
+
     def __init__(self, user_id: int, bet: int, mines_count: int, multiplier: int, size: int = 5, timeout: Optional[float] = 300):
         super().__init__(timeout=timeout)
         self.user_id = user_id
@@ -316,16 +743,33 @@ class MinesView(discord.ui.View):
         self.multiplier = multiplier
         total = size * size
         mines_count = min(max(1, mines_count), total - 1)
-        self.mines = set(random.sample(range(total), mines_count))
-        self.revealed: set[int] = set()
+        self.mines_count = mines_count
+        # Bitmask board state: membership is one shift+AND and the revealed
+        # count is a single bit_count(), vs per-click set hashing.
+        self.mines_mask = 0
+        for pos in _RNG.sample(range(total), mines_count):
+            self.mines_mask |= 1 << pos
+        self.revealed_mask = 0
         self.alive = True
+        self._busy = False  # one click settles at a time; extras are dropped
         self.safe_total = total - mines_count
 
-        # 5x5 button grid
-        for idx in range(total):
-            btn = self._make_tile(idx)
-            btn.row = idx // size
-            self.add_item(btn)
+        # 5x5 button grid, plus a direct tile-id -> button index so callbacks
+        # never linear-scan self.children
+        self._tiles: List[discord.ui.Button] = []
+        if size == self._GRID_SIZE:
+            for tmpl in self._TILE_TEMPLATE:
+                btn = copy.copy(tmpl)
+                btn._underlying = copy.copy(tmpl._underlying)  # styling must not leak into the template
+                btn.callback = self._tile_click
+                self._tiles.append(btn)
+                self.add_item(btn)
+        else:
+            for idx in range(total):
+                btn = self._make_tile(idx)
+                btn.row = idx // size
+                self._tiles.append(btn)
+                self.add_item(btn)
 
         # Cash Out button
         self.add_item(self._cashout_button())
@@ -333,81 +777,92 @@ class MinesView(discord.ui.View):
     def _payout_now(self) -> int:
         # Linear scaling so full clear == bet * multiplier
         # payout = bet * (1 + progress * (multiplier - 1))
-        progress = len(self.revealed) / self.safe_total if self.safe_total else 0
+        progress = self.revealed_mask.bit_count() / self.safe_total if self.safe_total else 0
         return int(self.bet * (1 + progress * (self.multiplier - 1)))
 
     def _make_tile(self, idx: int) -> discord.ui.Button:
+        # One shared bound-method callback for all 25 tiles (the tile index
+        # rides in the custom_id), instead of a fresh closure per button.
         b = discord.ui.Button(
             emoji="⬛",
             style=discord.ButtonStyle.secondary,
             custom_id=f"mine_{idx}"
         )
+        b.callback = self._tile_click
+        return b
 
-        async def on_click(interaction: discord.Interaction):
-            if interaction.user.id != self.user_id:
-                return await interaction.response.send_message("This game isn't yours. Use `/casino`.")
-            if not self.alive:
-                return await interaction.response.send_message("Game over. Open `/casino` to start again.")
+    async def _tile_click(self, interaction: discord.Interaction):
+        # Button-spam guard: while a click is settling, further clicks are
+        # ACKed and dropped instead of piling up coroutines on the same board.
+        if self._busy:
+            return await interaction.response.defer()
+        self._busy = True
+        try:
+            await self._tile_click_inner(interaction)
+        finally:
+            self._busy = False
 
-            # locate the live button
-            button = None
-            for child in self.children:
-                if isinstance(child, discord.ui.Button) and child.custom_id == b.custom_id:
-                    button = child
-                    break
-
-            if idx in self.revealed:
-                return await interaction.response.defer()
-
-            if idx in self.mines:
-                # lose bet (clamped to balance)
-                self.alive = False
-                bal = await get_balance(self.user_id)
-                loss = min(self.bet, bal)
-                await set_balance(self.user_id, bal - loss)
-                await add_transaction(self.user_id, "mines_loss", -loss, f"hit {idx} mines={len(self.mines)}")
-
-                for i, child in enumerate(self.children):
-                    if isinstance(child, discord.ui.Button):
-                        child.disabled = True
-                        if child.custom_id and child.custom_id.startswith("mine_"):
-                            if int(child.custom_id.split("_")[1]) in self.mines:
-                                child.style = discord.ButtonStyle.danger
-                                child.emoji = "💣"
-                return await interaction.response.edit_message(
-                    content=f"💥 You hit a mine! **-{loss} CYAN**",
-                    view=self
-                )
+    async def _tile_click_inner(self, interaction: discord.Interaction):
+        idx = int(interaction.data["custom_id"].split("_", 1)[1])
+        if interaction.user.id != self.user_id:
+            return await interaction.response.send_message("This game isn't yours. Use `/casino`.")
+        if not self.alive:
+            return await interaction.response.send_message("Game over. Open `/casino` to start again.")
 
-            # safe
-            self.revealed.add(idx)
-            if button:
-                button.style = discord.ButtonStyle.success
-                button.emoji = "✅"
-                button.disabled = True
-
-            safe_left = self.safe_total - len(self.revealed)
-            if safe_left == 0:
-                # cleared → win full multiplier
-                self.alive = False
-                win = self.bet * self.multiplier
-                bal = await get_balance(self.user_id)
-                await set_balance(self.user_id, bal + win)
-                await add_transaction(self.user_id, "mines_win", win, f"cleared mines={len(self.mines)} mult={self.multiplier}")
-                for child in self.children:
-                    if isinstance(child, discord.ui.Button):
-                        child.disabled = True
-                return await interaction.response.edit_message(
-                    content=f"🎉 Cleared the board! **+{win} CYAN** (x{self.multiplier})",
-                    view=self
-                )
-            return await interaction.response.edit_message(
-                content=f"🧨 **Mines** — Safes found: **{len(self.revealed)}/{self.safe_total}** · Potential cashout: **{self._payout_now()} CYAN**",
+        button = self._tiles[idx]
+
+        # ACK immediately: the settle transaction and message edit then run
+        # against the 15-minute followup window, not the 3-second deadline.
+        await interaction.response.defer()
+
+        if self.revealed_mask >> idx & 1:
+            return
+
+        if self.mines_mask >> idx & 1:
+            # lose bet (clamped to balance)
+            self.alive = False
+            self.stop()  # terminal: free the listener and its timeout timer
+            loss = await debit_up_to(self.user_id, self.bet, "mines_loss", f"hit {idx} mines={self.mines_count}")
+
+            for child in self.children:
+                child.disabled = True
+            m = self.mines_mask
+            while m:  # style only the actual mines, one set bit at a time
+                i = (m & -m).bit_length() - 1
+                tile = self._tiles[i]
+                tile.style = discord.ButtonStyle.danger
+                tile.emoji = "💣"
+                m &= m - 1
+            return await interaction.edit_original_response(
+                content=f"💥 You hit a mine! **-{loss} CYAN**",
                 view=self
             )
 
-        b.callback = on_click
-        return b
+        # safe
+        self.revealed_mask |= 1 << idx
+        if button:
+            button.style = discord.ButtonStyle.success
+            button.emoji = "✅"
+            button.disabled = True
+
+        safe_left = self.safe_total - self.revealed_mask.bit_count()
+        if safe_left == 0:
+            # cleared → win full multiplier
+            self.alive = False
+            self.stop()
+            win = self.bet * self.multiplier
+            await adjust_balance(self.user_id, win, "mines_win", f"cleared mines={self.mines_count} mult={self.multiplier}")
+            for child in self.children:
+                if isinstance(child, discord.ui.Button):
+                    child.disabled = True
+            return await interaction.edit_original_response(
+                content=f"🎉 Cleared the board! **+{win} CYAN** (x{self.multiplier})",
+                view=self
+            )
+        return await interaction.edit_original_response(
+            content=f"🧨 **Mines** — Safes found: **{self.revealed_mask.bit_count()}/{self.safe_total}** · Potential cashout: **{self._payout_now()} CYAN**",
+            view=self
+        )
 
     def _cashout_button(self) -> discord.ui.Button:
         b = discord.ui.Button(label="Cash Out", style=discord.ButtonStyle.primary, emoji="💵", custom_id="mines_cashout")
@@ -417,16 +872,16 @@ class MinesView(discord.ui.View):
                 return await interaction.response.send_message("This panel belongs to someone else. Use `/casino`.")
             if not self.alive:
                 return await interaction.response.send_message("Game already ended.")
+            await interaction.response.defer()
             self.alive = False
+            self.stop()
             payout = self._payout_now()
-            bal = await get_balance(self.user_id)
-            await set_balance(self.user_id, bal + payout)
-            await add_transaction(self.user_id, "mines_cashout", payout, f"revealed {len(self.revealed)}/{self.safe_total}, mult={self.multiplier}")
+            await adjust_balance(self.user_id, payout, "mines_cashout", f"revealed {self.revealed_mask.bit_count()}/{self.safe_total}, mult={self.multiplier}")
             for child in self.children:
                 if isinstance(child, discord.ui.Button):
                     child.disabled = True
-            await interaction.response.edit_message(
-                content=f"💵 **Cashed Out** for **+{payout} CYAN**. (Bet {self.bet}, progress {len(self.revealed)}/{self.safe_total})",
+            await interaction.edit_original_response(
+                content=f"💵 **Cashed Out** for **+{payout} CYAN**. (Bet {self.bet}, progress {self.revealed_mask.bit_count()}/{self.safe_total})",
                 view=self
             )
 
@@ -474,10 +929,22 @@ class TowerView(discord.ui.View):
         self.choices = choices_per_row
         self.current_row = 0
         self.alive = True
-        # Pre-generate bomb positions per row
-        self.bombs = [random.randint(0, self.choices - 1) for _ in range(self.rows)]
+        self._busy = False  # same click-spam guard as MinesView
+        # Pre-generate bomb positions per row — one C-level draw for all rows
+        self.bombs = _RNG.choices(range(self.choices), k=self.rows)
         # Progress-based multiplier (linear → full clear x4)
         self.full_mult = 4
+
+        # One fixed set of row buttons reused for every row: _render_row only
+        # mutates labels/custom_ids in place, so advancing a row allocates no
+        # Buttons and no closures. The shared callback reads the row from the
+        # custom_id, which also makes a stale double-click a no-op.
+        self._row_buttons: List[discord.ui.Button] = []
+        for i in range(self.choices):
+            b = discord.ui.Button(style=discord.ButtonStyle.secondary)
+            b.callback = self._pick_click
+            self._row_buttons.append(b)
+            self.add_item(b)
         self._render_row()
 
         # Cash Out
@@ -488,70 +955,71 @@ class TowerView(discord.ui.View):
         return int(self.bet * (1 + progress * (self.full_mult - 1)))
 
     def _render_row(self):
-        # Clear old row buttons (keep cashout at end)
-        to_remove = [ch for ch in self.children if isinstance(ch, discord.ui.Button) and ch.custom_id and ch.custom_id.startswith("tower_")]
-        for ch in to_remove:
-            self.remove_item(ch)
         if self.current_row >= self.rows:
             return
-        for i in range(self.choices):
-            b = discord.ui.Button(
-                label=f"Row {self.current_row+1} • Pick {i+1}",
-                style=discord.ButtonStyle.secondary,
-                custom_id=f"tower_{self.current_row}_{i}"
-            )
-            async def on_click(interaction: discord.Interaction, row=self.current_row, pick=i):
-                if interaction.user.id != self.user_id:
-                    return await interaction.response.send_message("This panel belongs to someone else. Use `/casino`.")
-                if not self.alive:
-                    return await interaction.response.send_message("Game over. Open `/casino` to start again.")
-                bomb = self.bombs[row]
-                # Disable row buttons
-                for child in self.children:
-                    if isinstance(child, discord.ui.Button) and child.custom_id and child.custom_id.startswith(f"tower_{row}_"):
-                        child.disabled = True
-                        if child.custom_id.endswith(f"_{bomb}"):
-                            child.style = discord.ButtonStyle.danger
-                            child.emoji = "💣"
-                        elif child.custom_id.endswith(f"_{pick}") and pick != bomb:
-                            child.style = discord.ButtonStyle.success
-                            child.emoji = "✅"
-                if pick == bomb:
-                    # Lose
-                    self.alive = False
-                    bal = await get_balance(self.user_id)
-                    loss = min(self.bet, bal)
-                    await set_balance(self.user_id, bal - loss)
-                    await add_transaction(self.user_id, "tower_loss", -loss, f"row {row+1}")
-                    # Disable everything
-                    for ch in self.children:
-                        if isinstance(ch, discord.ui.Button):
-                            ch.disabled = True
-                    return await interaction.response.edit_message(content=f"💥 **Tower** — Hit a bomb at row {row+1}! **-{loss} CYAN**", view=self)
-                else:
-                    # Advance
-                    self.current_row += 1
-                    if self.current_row >= self.rows:
-                        # Full clear win
-                        self.alive = False
-                        win = self.bet * self.full_mult
-                        bal = await get_balance(self.user_id)
-                        await set_balance(self.user_id, bal + win)
-                        await add_transaction(self.user_id, "tower_win", win, f"rows={self.rows} mult={self.full_mult}")
-                        for ch in self.children:
-                            if isinstance(ch, discord.ui.Button):
-                                ch.disabled = True
-                        return await interaction.response.edit_message(content=f"🎉 **Tower** — Reached the top! **+{win} CYAN** (x{self.full_mult})", view=self)
-                    else:
-                        # Render next row
-                        self._render_row()
-                        return await interaction.response.edit_message(
-                            content=f"🧱 **Tower** — Progress: **{self.current_row}/{self.rows}** · Potential cashout: **{self._payout_now()} CYAN**",
-                            view=self
-                        )
-            b.callback = on_click
-            # Insert before cashout button (which is last)
-            self.children.insert(len(self.children), b)
+        r = self.current_row
+        for i, b in enumerate(self._row_buttons):
+            b.label = f"Row {r+1} • Pick {i+1}"
+            b.style = discord.ButtonStyle.secondary
+            b.emoji = None
+            b.disabled = False
+            b.custom_id = f"tower_{r}_{i}"
+
+    async def _pick_click(self, interaction: discord.Interaction):
+        if self._busy:
+            return await interaction.response.defer()
+        self._busy = True
+        try:
+            await self._pick_click_inner(interaction)
+        finally:
+            self._busy = False
+
+    async def _pick_click_inner(self, interaction: discord.Interaction):
+        _, row, pick = interaction.data["custom_id"].split("_")
+        row, pick = int(row), int(pick)
+        if interaction.user.id != self.user_id:
+            return await interaction.response.send_message("This panel belongs to someone else. Use `/casino`.")
+        if not self.alive:
+            return await interaction.response.send_message("Game over. Open `/casino` to start again.")
+        await interaction.response.defer()
+        if row != self.current_row:  # click raced a row advance
+            return
+        bomb = self.bombs[row]
+        for i, b in enumerate(self._row_buttons):
+            b.disabled = True
+            if i == bomb:
+                b.style = discord.ButtonStyle.danger
+                b.emoji = "💣"
+            elif i == pick:
+                b.style = discord.ButtonStyle.success
+                b.emoji = "✅"
+        if pick == bomb:
+            # Lose
+            self.alive = False
+            self.stop()
+            loss = await debit_up_to(self.user_id, self.bet, "tower_loss", f"row {row+1}")
+            for ch in self.children:
+                if isinstance(ch, discord.ui.Button):
+                    ch.disabled = True
+            return await interaction.edit_original_response(content=f"💥 **Tower** — Hit a bomb at row {row+1}! **-{loss} CYAN**", view=self)
+        # Advance
+        self.current_row += 1
+        if self.current_row >= self.rows:
+            # Full clear win
+            self.alive = False
+            self.stop()
+            win = self.bet * self.full_mult
+            await adjust_balance(self.user_id, win, "tower_win", f"rows={self.rows} mult={self.full_mult}")
+            for ch in self.children:
+                if isinstance(ch, discord.ui.Button):
+                    ch.disabled = True
+            return await interaction.edit_original_response(content=f"🎉 **Tower** — Reached the top! **+{win} CYAN** (x{self.full_mult})", view=self)
+        # Render next row
+        self._render_row()
+        return await interaction.edit_original_response(
+            content=f"🧱 **Tower** — Progress: **{self.current_row}/{self.rows}** · Potential cashout: **{self._payout_now()} CYAN**",
+            view=self
+        )
 
     def _cashout_button(self) -> discord.ui.Button:
         b = discord.ui.Button(label="Cash Out", style=discord.ButtonStyle.primary, emoji="💵", custom_id="tower_cashout")
@@ -560,27 +1028,37 @@ class TowerView(discord.ui.View):
                 return await interaction.response.send_message("This panel belongs to someone else. Use `/casino`.")
             if not self.alive:
                 return await interaction.response.send_message("Game already ended.")
+            await interaction.response.defer()
             self.alive = False
+            self.stop()
             payout = self._payout_now()
-            bal = await get_balance(self.user_id)
-            await set_balance(self.user_id, bal + payout)
-            await add_transaction(self.user_id, "tower_cashout", payout, f"progress {self.current_row}/{self.rows}")
+            await adjust_balance(self.user_id, payout, "tower_cashout", f"progress {self.current_row}/{self.rows}")
             for child in self.children:
                 if isinstance(child, discord.ui.Button):
                     child.disabled = True
-            await interaction.response.edit_message(content=f"💵 **Tower Cashout** — **+{payout} CYAN** (Bet {self.bet}, progress {self.current_row}/{self.rows})", view=self)
+            await interaction.edit_original_response(content=f"💵 **Tower Cashout** — **+{payout} CYAN** (Bet {self.bet}, progress {self.current_row}/{self.rows})", view=self)
         b.callback = on_click
         return b
 
 # ---- Roulette (Red/Black/Green/Number)
-ROULETTE_RED = {1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36}
-ROULETTE_BLACK = {2,4,6,8,10,11,13,15,17,20,22,24,26,28,29,31,33,35}
+ROULETTE_RED = frozenset({1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36})
+ROULETTE_BLACK = frozenset({2,4,6,8,10,11,13,15,17,20,22,24,26,28,29,31,33,35})
+# Direct pocket -> color table: one index per spin instead of set membership.
+ROULETTE_COLOR = tuple(
+    "green" if i == 0 else ("red" if i in ROULETTE_RED else "black") for i in range(37))
+# Color bets share one shape: (display label, winning color, multiplier).
+_ROULETTE_BETS = {
+    "red":   ("Red", "red", 2),
+    "black": ("Black", "black", 2),
+    "green": ("Green (0)", "green", 14),
+}
 
 class RouletteView(discord.ui.View):
     def __init__(self, user_id: int, bet: int, timeout: Optional[float] = 180):
         super().__init__(timeout=timeout)
         self.user_id = user_id
         self.bet = clamp_bet(bet)
+        self._busy = False
 
     async def _guard(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.user_id:
@@ -614,47 +1092,47 @@ class RouletteView(discord.ui.View):
             num = int(number_text)
             if num < 0 or num > 36:
                 raise ValueError
-        except:
+        except ValueError:
             return await interaction.response.send_message("Enter a valid number from 0 to 36.")
         await self._spin(interaction, kind="number", number=num)
 
     async def _spin(self, interaction: discord.Interaction, kind: str, number: Optional[int] = None):
-        bal = await get_balance(self.user_id)
+        if self._busy:
+            return await interaction.response.defer()
+        self._busy = True
+        try:
+            await self._spin_inner(interaction, kind, number)
+        finally:
+            self._busy = False
+
+    async def _spin_inner(self, interaction: discord.Interaction, kind: str, number: Optional[int] = None):
+        await interaction.response.defer(thinking=True)
         bet_amt = clamp_bet(self.bet)
-        if bet_amt > bal:
-            return await interaction.response.send_message("Not enough CYAN for that bet.")
         # Spin wheel 0..36
-        result = random.randint(0, 36)
-        color = "green" if result == 0 else ("red" if result in ROULETTE_RED else "black")
-        win_mult = 0
-        label = ""
-
-        if kind == "red":
-            win_mult = 2 if color == "red" else 0
-            label = "Red"
-        elif kind == "black":
-            win_mult = 2 if color == "black" else 0
-            label = "Black"
-        elif kind == "green":
-            win_mult = 14 if result == 0 else 0
-            label = "Green (0)"
-        elif kind == "number":
+        result = _RNG.randint(0, 36)
+        color = ROULETTE_COLOR[result]
+        if kind == "number":
             label = f"Number {number}"
             win_mult = 36 if result == number else 0
+        else:
+            label, target, mult = _ROULETTE_BETS[kind]
+            win_mult = mult if color == target else 0
 
         if win_mult:
             win = bet_amt * win_mult
-            new_bal = bal + win
-            await add_transaction(self.user_id, "roulette_win", win, f"{label} vs {result} ({color})")
-            await set_balance(self.user_id, new_bal)
-            return await interaction.response.send_message(
+            new_bal = await apply_bet_delta(self.user_id, win, "roulette_win",
+                                            f"{label} vs {result} ({color})", min_balance=bet_amt)
+            if new_bal is None:
+                return await interaction.followup.send("Not enough CYAN for that bet.")
+            return await interaction.followup.send(
                 f"🎡 **Roulette** — Bet **{label}**. Result: **{result} {color}** → **+{win} CYAN**\nBalance: **{new_bal}**"
             )
         else:
-            new_bal = bal - bet_amt
-            await add_transaction(self.user_id, "roulette_loss", -bet_amt, f"{label} vs {result} ({color})")
-            await set_balance(self.user_id, new_bal)
-            return await interaction.response.send_message(
+            new_bal = await apply_bet_delta(self.user_id, -bet_amt, "roulette_loss",
+                                            f"{label} vs {result} ({color})", min_balance=bet_amt)
+            if new_bal is None:
+                return await interaction.followup.send("Not enough CYAN for that bet.")
+            return await interaction.followup.send(
                 f"🎡 **Roulette** — Bet **{label}**. Result: **{result} {color}** → **-{bet_amt} CYAN**\nBalance: **{new_bal}**"
             )
 
@@ -668,42 +1146,39 @@ class RouletteNumberModal(discord.ui.Modal, title="Exact Number Bet"):
 
 # ---- Rewards: Select menu inside GUI
 class RewardSelect(discord.ui.Select):
+    # SelectOptions are plain data holders, so one list per rewards-cache
+    # version is shared by every menu instead of rebuilt per click.
+    _opts_version = -1
+    _opts: List[discord.SelectOption] = []
+
     def __init__(self, rows: List[Tuple[int,int,int]]):
-        opts = []
-        for rid, cost, robux in rows[:25]:  # max 25 options
-            opts.append(discord.SelectOption(
-                label=f"{robux} Robux",
-                description=f"Costs {cost} CYAN",
-                value=str(rid),
-                emoji="🎁"
-            ))
-        super().__init__(placeholder="Choose a reward to redeem…", options=opts, min_values=1, max_values=1)
+        cls = type(self)
+        if cls._opts_version != _REWARDS_VERSION:
+            cls._opts = [
+                discord.SelectOption(
+                    label=f"{robux} Robux",
+                    description=f"Costs {cost} CYAN",
+                    value=str(rid),
+                    emoji="🎁"
+                )
+                for rid, cost, robux in rows[:25]  # max 25 options
+            ]
+            cls._opts_version = _REWARDS_VERSION
+        super().__init__(placeholder="Choose a reward to redeem…", options=cls._opts, min_values=1, max_values=1)
 
     async def callback(self, interaction: discord.Interaction):
+        # Heaviest player-facing path (DB transaction + staff-channel send):
+        # ACK first, answer via followup.
+        await interaction.response.defer(thinking=True)
         rid = int(self.values[0])
-        with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("SELECT cost_cyan, robux FROM rewards WHERE id=?", (rid,))
-            row = c.fetchone()
-        if not row:
-            return await interaction.response.send_message("Reward not found.")
-        cost, robux = row
-        bal = await get_balance(interaction.user.id)
-        if cost > bal:
-            return await interaction.response.send_message("Not enough CYAN for that reward.")
-
-        # charge + record request
-        await set_balance(interaction.user.id, bal - cost)
-        await add_transaction(interaction.user.id, "redeem_request", -cost, f"reward_id {rid} robux {robux}")
-        ts = datetime.now(timezone.utc).isoformat()
-        with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("INSERT INTO redeems(user_id, amount, status, ts, reason, reward_id, ticket_channel_id) VALUES(?,?,?,?,?,?,?)",
-                      (interaction.user.id, cost, "pending", ts, "", rid, None))
-            request_id = c.lastrowid
-            conn.commit()
-
-        staff_channel_id = setting_get("staff_channel_id")
+        res = await submit_redeem(interaction.user.id, rid)
+        if res is None:
+            return await interaction.followup.send("Reward not found.")
+        request_id, cost, robux = res
+        if request_id is None:
+            return await interaction.followup.send("Not enough CYAN for that reward.")
+
+        staff_channel_id = await setting_get("staff_channel_id")
         if staff_channel_id:
             ch = interaction.guild.get_channel(int(staff_channel_id))
             if ch:
@@ -714,9 +1189,9 @@ class RewardSelect(discord.ui.Select):
                                  f"Request ID: **{request_id}**"),
                     color=CYAN_COLOR
                 )
-                await ch.send(embed=embed, view=RedeemReviewView(request_id=request_id, user_id=interaction.user.id, amount=cost, reward_id=rid))
+                await ch.send(embed=embed, view=RedeemReviewView(request_id))
 
-        await interaction.response.send_message(f"✅ Redeem request `#{request_id}` submitted. Staff will review.")
+        await interaction.followup.send(f"✅ Redeem request `#{request_id}` submitted. Staff will review.")
 
 class RewardsView(discord.ui.View):
     def __init__(self, rows: List[Tuple[int,int,int]], *, timeout: Optional[float]=120):
@@ -733,9 +1208,9 @@ class BetModal(discord.ui.Modal, title="Set Bet"):
     async def on_submit(self, interaction: discord.Interaction):
         try:
             bet_int = clamp_bet(int(self.bet.value))
-            await self.on_set(interaction, bet_int)
-        except:
-            await interaction.response.send_message("Enter a valid number.")
+        except ValueError:
+            return await interaction.response.send_message("Enter a valid number.")
+        await self.on_set(interaction, bet_int)
 
 class CasinoMenuView(discord.ui.View):
     def __init__(self, user_id: int, bet: Optional[int] = None, timeout: Optional[float] = 600):
@@ -803,7 +1278,7 @@ class CasinoMenuView(discord.ui.View):
     @discord.ui.button(label="Rewards", style=discord.ButtonStyle.secondary, emoji="🎁")
     async def rewards(self, interaction: discord.Interaction, _btn: discord.ui.Button):
         if not await self._guard(interaction): return
-        rows = list_rewards()
+        rows = await list_rewards()
         if not rows:
             return await interaction.response.send_message("No rewards configured yet. Ask staff to add rewards.")
         await interaction.response.send_message("Select a reward to redeem:", view=RewardsView(rows))
@@ -815,55 +1290,61 @@ class CasinoMenuView(discord.ui.View):
         await interaction.response.edit_message(embed=casino_embed(interaction.user, bal, self.bet), view=self)
 
     async def _do_coinflip(self, interaction: discord.Interaction, choice: str):
-        bal = await get_balance(self.user_id)
         bet = clamp_bet(self.bet)
-        if bet > bal:
-            return await interaction.response.send_message("Not enough CYAN for that bet.")
-        result = random.choice(["heads", "tails"])
+        result = "heads" if _RNG.getrandbits(1) else "tails"
         win = (choice == result)
-        if win:
-            new_bal = bal + bet
-            await add_transaction(self.user_id, "coinflip_win", bet, f"choice {choice} result {result}")
-            msg = f"🪙 **Coinflip** — You chose **{choice}**. Coin: **{result}**. You **won +{bet}**."
-        else:
-            new_bal = bal - bet
-            await add_transaction(self.user_id, "coinflip_loss", -bet, f"choice {choice} result {result}")
-            msg = f"🪙 **Coinflip** — You chose **{choice}**. Coin: **{result}**. You **lost -{bet}**."
-        await set_balance(self.user_id, new_bal)
-        await interaction.response.send_message(f"{msg}\nBalance: **{new_bal} CYAN**")
+        new_bal = await apply_bet_delta(
+            self.user_id, bet if win else -bet,
+            "coinflip_win" if win else "coinflip_loss",
+            f"choice {choice} result {result}", min_balance=bet)
+        if new_bal is None:
+            return await interaction.response.send_message("Not enough CYAN for that bet.")
+        outcome = f"won +{bet}" if win else f"lost -{bet}"
+        await interaction.response.send_message(
+            f"🪙 **Coinflip** — You chose **{choice}**. Coin: **{result}**. You **{outcome}**.\nBalance: **{new_bal} CYAN**")
 
     async def _do_slots(self, interaction: discord.Interaction):
-        bal = await get_balance(self.user_id)
         bet = clamp_bet(self.bet)
-        if bet > bal:
-            return await interaction.response.send_message("Not enough CYAN for that bet.")
-        symbols = ["🍒","🍋","🍊","⭐","7"]
-        reel = [random.choice(symbols) for _ in range(3)]
-        if len(set(reel)) == 1: mult = 10
-        elif any(reel.count(s) == 2 for s in reel): mult = 2
+        reel = _RNG.choices(SLOTS_SYMBOLS, k=3)  # one C-level call vs three choice() round trips
+        a, b, c = reel
+        if a == b == c: mult = 10
+        elif a == b or b == c or a == c: mult = 2
         else: mult = 0
-        if mult:
-            win = bet * mult
-            new_bal = bal + win
-            await add_transaction(self.user_id, "slots_win", win, f"{reel}")
-            text = f"🎰 **Slots** — {' '.join(reel)} → **+{win} CYAN**"
-        else:
-            new_bal = bal - bet
-            await add_transaction(self.user_id, "slots_loss", -bet, f"{reel}")
-            text = f"🎰 **Slots** — {' '.join(reel)} → **-{bet} CYAN**"
-        await set_balance(self.user_id, new_bal)
-        await interaction.response.send_message(f"{text}\nBalance: **{new_bal} CYAN**")
+        delta = bet * mult if mult else -bet
+        ttype = "slots_win" if mult else "slots_loss"
+        # 3-digit symbol-index code: a fraction of the list repr per logged spin
+        reel_code = f"{SYMBOL_IDX[a]}{SYMBOL_IDX[b]}{SYMBOL_IDX[c]}"
+        new_bal = await apply_bet_delta(self.user_id, delta, ttype, reel_code, min_balance=bet)
+        if new_bal is None:
+            return await interaction.response.send_message("Not enough CYAN for that bet.")
+        sign = f"+{delta}" if mult else f"{delta}"
+        await interaction.response.send_message(
+            f"🎰 **Slots** — {' '.join(reel)} → **{sign} CYAN**\nBalance: **{new_bal} CYAN**")
 
 # =========================
 # 5) EVENTS — setup_hook (instant publish) + on_ready (login msg)
 # =========================
 @bot.event
 async def setup_hook():
-    init_db()
+    global _TX_FLUSHER_TASK
+    await init_db()
+    # keep a reference: asyncio only holds tasks weakly, and a GC'd flusher
+    # would silently stop draining the audit queue
+    _TX_FLUSHER_TASK = bot.loop.create_task(_tx_flusher())
+    bot.add_dynamic_items(RedeemActionButton, TicketCloseButton)
     local_cmds = bot.tree.get_commands()
     print(f"[SETUP] Local commands: {len(local_cmds)} -> {[c.name for c in local_cmds]}")
     bot.tree.copy_global_to(guild=GUILD_OBJ)
+    # Sync is a heavily rate-limited REST call; skip it when the command
+    # signatures haven't changed since the last publish.
+    sig = hashlib.sha1(json.dumps(
+        sorted(json.dumps(c.to_dict(bot.tree), sort_keys=True) for c in local_cmds)
+    ).encode()).hexdigest()
+    if sig == await setting_get("cmd_sync_sig"):
+        print(f"[SETUP] Command signatures unchanged; skipping sync to guild {GUILD_ID}")
+        return
     synced = await bot.tree.sync(guild=GUILD_OBJ)
+    await setting_set("cmd_sync_sig", sig)
     print(f"[SETUP] Synced {len(synced)} commands to guild {GUILD_ID} -> {[c.name for c in synced]}")
 
 @bot.event
@@ -880,39 +1361,60 @@ async def balance(interaction: discord.Interaction):
 
 @bot.tree.command(description="Claim daily CYAN")
 async def daily(interaction: discord.Interaction):
-    async with db_lock:
-        with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("SELECT last_daily, balance FROM users WHERE user_id=?", (interaction.user.id,))
-            r = c.fetchone()
-            now = datetime.now(timezone.utc)
-            if r:
-                last = r[0]; bal = r[1]
-                if last and now - datetime.fromisoformat(last) < timedelta(hours=24):
-                    return await interaction.response.send_message(f"{interaction.user.mention} already claimed in the last 24h.")
-            else:
-                bal = 0
-            bal += DAILY_AMOUNT
-            c.execute("INSERT INTO users(user_id,balance,last_daily) VALUES(?,?,?) "
-                      "ON CONFLICT(user_id) DO UPDATE SET balance=?, last_daily=?",
-                      (interaction.user.id, bal, now.isoformat(), bal, now.isoformat()))
-            conn.commit()
+    # One conditional upsert: the cooldown check lives in the WHERE clause and
+    # RETURNING tells us whether it fired, so there's no SELECT + Python branch.
+    async with _DB_WRITE:
+        async with _CONN.execute(SQL_DAILY_UPSERT, (interaction.user.id, DAILY_AMOUNT, now_ts())) as cur:
+            r = await cur.fetchone()
+        if r is not None:  # cache put stays inside the lock, like the write helpers
+            _bal_cache_put(interaction.user.id, r[0])
+    if r is None:
+        return await interaction.response.send_message(f"{interaction.user.mention} already claimed in the last 24h.")
+    bal = r[0]
     await add_transaction(interaction.user.id, "daily", DAILY_AMOUNT, "claimed daily")
     await interaction.response.send_message(f"✅ {interaction.user.mention} Daily: **{DAILY_AMOUNT} CYAN** — New balance **{bal}**")
 
+_LB_ROW = "{i}. {name} — {bal} CYAN".format  # bound once, not re-parsed per row
+
+# Short TTL cache keyed by `top`: under burst usage identical leaderboard
+# queries collapse into one. Standings lag by at most the TTL, which is fine
+# for a vanity board; write-side invalidation would fire on every bet and
+# defeat the cache. `top` is clamped to 1..25, which also bounds the cache
+# to at most 25 keys — a message fits ~25 rows anyway.
+_LB_CACHE: Dict[int, Tuple[float, list]] = {}
+_LB_TTL = 30.0
+_LB_TOP_MAX = 25
+
 @bot.tree.command(description="Show leaderboard")
+@app_commands.describe(top=f"How many rows to show (1–{_LB_TOP_MAX})")
 async def leaderboard(interaction: discord.Interaction, top: int = 10):
-    with sqlite3.connect(DB) as conn:
-        c = conn.cursor()
-        c.execute("SELECT user_id, balance FROM users ORDER BY balance DESC LIMIT ?", (top,))
-        rows = c.fetchall()
+    top = min(_LB_TOP_MAX, max(1, top))
+    cached = _LB_CACHE.get(top)
+    if cached and time.monotonic() - cached[0] < _LB_TTL:
+        rows = cached[1]
+    else:
+        rows = await read_all("SELECT user_id, balance FROM users ORDER BY balance DESC LIMIT ?", (top,))
+        _LB_CACHE[top] = (time.monotonic(), rows)
     if not rows:
         return await interaction.response.send_message("No balances yet.")
-    lines = []
-    for i, (uid, bal) in enumerate(rows, start=1):
+    # Resolve names from cache first, then one gateway query for the misses
+    # instead of a per-row fetch.
+    names: Dict[int, str] = {}
+    missing = []
+    for uid, _bal in rows:
         member = interaction.guild.get_member(uid)
-        name = member.display_name if member else str(uid)
-        lines.append(f"{i}. {name} — {bal} CYAN")
+        if member:
+            names[uid] = member.display_name
+        else:
+            missing.append(uid)
+    if missing:
+        try:
+            for member in await interaction.guild.query_members(user_ids=missing):
+                names[member.id] = member.display_name
+        except (discord.HTTPException, asyncio.TimeoutError):
+            pass  # gateway chunking can time out, too — fall back to raw IDs
+    lines = [_LB_ROW(i=i, name=names.get(uid, uid), bal=bal)
+             for i, (uid, bal) in enumerate(rows, start=1)]
     await interaction.response.send_message("**Top balances**\n" + "\n".join(lines))
 
 # Gift (player → player)
@@ -923,14 +1425,8 @@ async def gift(interaction: discord.Interaction, user: discord.Member, amount: i
         return await interaction.response.send_message("You can't gift yourself.")
     if amount <= 0:
         return await interaction.response.send_message("Amount must be at least 1.")
-    sender_bal = await get_balance(interaction.user.id)
-    if amount > sender_bal:
+    if not await transfer(interaction.user.id, user.id, amount):
         return await interaction.response.send_message("Not enough CYAN.")
-    await set_balance(interaction.user.id, sender_bal - amount)
-    recv_bal = await get_balance(user.id)
-    await set_balance(user.id, recv_bal + amount)
-    await add_transaction(interaction.user.id, "gift_send", -amount, f"to {user.id}")
-    await add_transaction(user.id, "gift_recv", amount, f"from {interaction.user.id}")
     await interaction.response.send_message(f"🎁 {interaction.user.mention} sent **{amount} CYAN** to **{user.display_name}**.")
 
 # Rewards (Admin)
@@ -940,44 +1436,65 @@ async def gift(interaction: discord.Interaction, user: discord.Member, amount: i
 async def addreward(interaction: discord.Interaction, cost_cyan: int, robux: int):
     if cost_cyan <= 0 or robux <= 0:
         return await interaction.response.send_message("Values must be positive.")
-    rid = add_reward(cost_cyan, robux)
+    rid = await add_reward(cost_cyan, robux)
     await interaction.response.send_message(f"✅ Added reward ID `{rid}` — **{cost_cyan} CYAN → {robux} Robux** (global)")
 
+@bot.tree.command(description="Admin: add several rewards at once (global)")
+@app_commands.describe(rewards="Comma-separated cost:robux pairs, e.g. 100:10, 250:30")
+@app_commands.checks.has_permissions(manage_guild=True)
+async def addrewards(interaction: discord.Interaction, rewards: str):
+    rows: List[Tuple[int, int]] = []
+    try:
+        for pair in rewards.split(","):
+            cost_s, robux_s = pair.split(":")
+            cost, robux = int(cost_s), int(robux_s)
+            if cost <= 0 or robux <= 0:
+                raise ValueError
+            rows.append((cost, robux))
+    except ValueError:
+        return await interaction.response.send_message(
+            "Use positive `cost:robux` pairs separated by commas, e.g. `100:10, 250:30`.")
+    ids = await add_rewards(rows)
+    listed = ", ".join(f"`{rid}`" for rid in ids)
+    await interaction.response.send_message(f"✅ Added {len(ids)} rewards — IDs {listed} (global)")
+
 @bot.tree.command(description="Admin: remove a reward (global)")
 @app_commands.describe(reward_id="ID to remove")
 @app_commands.checks.has_permissions(manage_guild=True)
 async def removereward(interaction: discord.Interaction, reward_id: int):
-    ok = remove_reward(reward_id)
+    ok = await remove_reward(reward_id)
     if ok:
         await interaction.response.send_message(f"🗑️ Removed reward `{reward_id}`.")
     else:
         await interaction.response.send_message("Reward not found.")
 
 # Info / Staff Channels
+# Only the footer varies per guild; copy the fixed template instead of
+# rebuilding the whole embed each /postinfo.
+_INFO_EMBED_TEMPLATE = discord.Embed(
+    title="CYAN — Gambling Minigames & Rewards",
+    description=(
+        "Open **/casino** and use buttons to play.\n"
+        "Economy: `/daily`, `/balance`, `/leaderboard`, `/gift`\n"
+        "Rewards: Press **Rewards** in `/casino` to pick from the list.\n\n"
+        "All payouts are manual and staff-reviewed."
+    ),
+    color=CYAN_COLOR
+)
+
 def info_embed(guild: discord.Guild) -> discord.Embed:
-    e = discord.Embed(
-        title="CYAN — Gambling Minigames & Rewards",
-        description=(
-            "Open **/casino** and use buttons to play.\n"
-            "Economy: `/daily`, `/balance`, `/leaderboard`, `/gift`\n"
-            "Rewards: Press **Rewards** in `/casino` to pick from the list.\n\n"
-            "All payouts are manual and staff-reviewed."
-        ),
-        color=CYAN_COLOR
-    )
-    e.set_footer(text=guild.name)
-    return e
+    return _INFO_EMBED_TEMPLATE.copy().set_footer(text=guild.name)
 
 @bot.tree.command(description="Set info channel (help post)")
 @app_commands.checks.has_permissions(manage_guild=True)
 async def setinfochannel(interaction: discord.Interaction, channel: discord.TextChannel):
-    setting_set("info_channel_id", str(channel.id))
+    await setting_set("info_channel_id", str(channel.id))
     await interaction.response.send_message(f"Info channel set to {channel.mention}.")
 
 @bot.tree.command(description="Post the info panel")
 @app_commands.checks.has_permissions(manage_guild=True)
 async def postinfo(interaction: discord.Interaction):
-    ch_id = setting_get("info_channel_id")
+    ch_id = await setting_get("info_channel_id")
     if not ch_id:
         return await interaction.response.send_message("Set an info channel first with `/setinfochannel`.")
     ch = interaction.guild.get_channel(int(ch_id))
@@ -985,13 +1502,13 @@ async def postinfo(interaction: discord.Interaction):
         return await interaction.response.send_message("Saved channel not found.")
     msg = await ch.send(embed=info_embed(interaction.guild))
     try: await msg.pin()
-    except: pass
+    except discord.HTTPException: pass
     await interaction.response.send_message(f"Posted in {ch.mention}.")
 
 @bot.tree.command(description="Set staff review channel (receives redeem requests)")
 @app_commands.checks.has_permissions(manage_guild=True)
 async def setstaffchannel(interaction: discord.Interaction, channel: discord.TextChannel):
-    setting_set("staff_channel_id", str(channel.id))
+    await setting_set("staff_channel_id", str(channel.id))
     await interaction.response.send_message(f"Staff channel set to {channel.mention}.")
 
 # Owner-only
@@ -1012,13 +1529,37 @@ async def setcyan(interaction: discord.Interaction, user: discord.Member, amount
 async def backupdb(interaction: discord.Interaction):
     if interaction.user.id != OWNER_ID:
         return await interaction.response.send_message("Owner only.")
+
+    def _snapshot() -> bytes:
+        # sqlite's online backup API gives a consistent copy even while the
+        # bot keeps writing; reading the raw file can race a WAL checkpoint.
+        fd, tmp = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            src = sqlite3.connect(DB)
+            dst = sqlite3.connect(tmp)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+                src.close()
+            with open(tmp, "rb") as f:
+                return f.read()
+        finally:
+            os.unlink(tmp)
+
+    # ACK first: on a large DB the snapshot can outlive the 3-second
+    # interaction window, and a late response.send_message dies with
+    # Unknown interaction on both the success and the error path.
+    await interaction.response.defer()
     try:
-        await interaction.response.send_message(
+        data = await asyncio.to_thread(_snapshot)  # snapshot + read off the loop
+        await interaction.followup.send(
             content="Here’s the current DB file.",
-            file=discord.File(DB, filename=os.path.basename(DB))
+            file=discord.File(io.BytesIO(data), filename=os.path.basename(DB))
         )
     except Exception as e:
-        await interaction.response.send_message(f"Backup failed: {e!r}")
+        await interaction.followup.send(f"Backup failed: {e!r}")
 
 # Casino opener
 @bot.tree.command(description="Open the CYAN casino panel")